@@ -0,0 +1,155 @@
+"""
+Микро-бенчмарк маршрутизации: сколько стоит доставить один апдейт до хендлера.
+
+Сравнивает два Dispatcher'а aiogram, собранных из общей таблицы common.ROUTES:
+со старой цепочкой @dp.message_handler(lambda ...) в исходном порядке регистрации и с Router. Время меряется через dp.process_update,
+т.е. по тому же пути check_filters, который проходит апдейт в боте. Сеть не используется.
+Запуск: python bench_router.py
+"""
+import asyncio
+import time
+
+from aiogram import Bot, Dispatcher, types
+
+from common import BTN_GRAPH, MAIN_MENU_BUTTONS, ROUTES, user_data
+from router import Router
+
+BENCH_TOKEN = "123456:BENCHBENCHBENCHBENCHBENCHBENCHBENCH"
+BENCH_USERNAME = "bench_bot"
+AMOUNT_USER_ID = 2
+
+
+def make_handler(name):
+    async def handler(update):
+        return name
+    handler.__name__ = name
+    return handler
+
+
+def make_handlers():
+    return {name: make_handler(name) for _, _, name in ROUTES}
+
+
+def build_linear_dispatcher(bot):
+    """Таблица ROUTES, зарегистрированная по-старому: по lambda-фильтру на каждый маршрут."""
+    dp = Dispatcher(bot)
+    handlers = make_handlers()
+    for kind, key, name in ROUTES:
+        handler = handlers[name]
+        if kind == "command":
+            dp.register_message_handler(handler, commands=[key])
+        elif kind == "text":
+            dp.register_message_handler(handler, lambda message, key=key: message.text in key)
+        elif kind == "fallback":
+            dp.register_message_handler(handler, key)
+        elif kind == "callback":
+            dp.register_callback_query_handler(handler, lambda c, key=key: c.data == key)
+        elif kind == "callback_prefix":
+            dp.register_callback_query_handler(
+                handler, lambda c, prefix=key + ":": c.data and c.data.startswith(prefix))
+    return dp
+
+
+def build_router_dispatcher(bot):
+    """Та же таблица через Router, как в bot.py."""
+    dp = Dispatcher(bot)
+    router = Router()
+    router.username = BENCH_USERNAME
+    dp.register_message_handler(router.dispatch_message, router.filter_message)
+    dp.register_callback_query_handler(router.dispatch_callback_query, router.filter_callback_query)
+    router.register(ROUTES, make_handlers())
+    return dp
+
+
+def make_message(text, user_id=1):
+    return types.Update.to_object({"update_id": 1, "message": {
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": user_id, "type": "private"},
+        "from": {"id": user_id, "is_bot": False, "first_name": "bench"},
+        "text": text,
+    }})
+
+
+def make_callback(data, user_id=1):
+    return types.Update.to_object({"update_id": 1, "callback_query": {
+        "id": "1",
+        "from": {"id": user_id, "is_bot": False, "first_name": "bench"},
+        "chat_instance": "1",
+        "data": data,
+    }})
+
+
+async def measure(dp, updates, rounds):
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for update in updates:
+                await dp.process_update(update)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / (rounds * len(updates))
+
+
+async def run(rounds):
+    bot = Bot(token=BENCH_TOKEN)
+    Bot.set_current(bot)
+    # Command-фильтр aiogram сверяет упоминание с bot.me; подставляем его, чтобы не ходить в сеть
+    bot._me = types.User(id=123456, is_bot=True, first_name="bench", username=BENCH_USERNAME)
+    user_data[AMOUNT_USER_ID] = {"from_currency": "USD"}
+
+    messages = (
+        [make_message(text) for text in MAIN_MENU_BUTTONS]
+        + [make_message("/start"), make_message("/alert USD > 100"),
+           make_message("/myalerts"), make_message("/delete_alert 1")]
+        + [make_message("123.45", user_id=AMOUNT_USER_ID)]
+    )
+    unmatched = [make_message("привет")]
+    callbacks = [make_callback(f"{p}:USD") for p in ("to_currency", "graph_currency", "best_rates_currency")]
+    callbacks.append(make_callback("cancel_conversion"))
+
+    linear = build_linear_dispatcher(bot)
+    routed = build_router_dispatcher(bot)
+
+    # Здесь оба варианта должны выбирать один и тот же хендлер
+    for update in messages + unmatched + callbacks:
+        assert await linear.process_update(update) == await routed.process_update(update)
+
+    # Команды с префиксом и упоминаниями - тоже без изменений
+    commands = [
+        ("/alertUSD", ["set_alert"]),
+        ("/alert@other_bot USD 1 2", ["set_alert"]),
+        (f"/myalerts@{BENCH_USERNAME}", ["view_alerts"]),
+        ("/start@other_bot", []),
+    ]
+    for text, expected in commands:
+        update = make_message(text)
+        assert await linear.process_update(update) == expected, text
+        assert await routed.process_update(update) == expected, text
+
+    # Задуманное изменение приоритета: пока пользователь вводит сумму, точные кнопки
+    # и команды теперь обрабатываются своими хендлерами, а не amount_selected
+    changed = [
+        (BTN_GRAPH, "choose_graph_currency"),
+        ("/myalerts", "view_alerts"),
+        ("/alert USD 100", "set_alert"),
+    ]
+    for text, expected in changed:
+        update = make_message(text, user_id=AMOUNT_USER_ID)
+        assert await linear.process_update(update) == ["amount_selected"], text
+        assert await routed.process_update(update) == [expected], text
+
+    cases = [("messages", messages), ("unmatched", unmatched), ("callbacks", callbacks)]
+    for kind, updates in cases:
+        for name, dp in (("linear", linear), ("router", routed)):
+            per_update = await measure(dp, updates, rounds)
+            print(f"{kind:<10} {name:<7} {per_update * 1e6:8.2f} мкс/апдейт")
+
+
+def main(rounds=2000):
+    asyncio.run(run(rounds))
+
+
+if __name__ == "__main__":
+    main()
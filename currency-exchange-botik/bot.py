@@ -12,6 +12,9 @@ from aiogram.utils import executor
 from aiogram.dispatcher.middlewares import BaseMiddleware
 from aiogram.dispatcher.handler import CancelHandler
 
+from common import CURRENCIES, MAIN_MENU_BUTTONS, ROUTES, user_data
+from router import Router, serialize_markup
+
 # ===== Конфигурация =====
 API_TOKEN = "token"
 CBR_API_URL = "https://www.cbr-xml-daily.ru/daily_json.js"
@@ -24,6 +27,11 @@ BANKI_API_URL = (
 bot = Bot(token=API_TOKEN)
 dp = Dispatcher(bot)
 
+# Все апдейты проходят через один хендлер, который ищет обработчик по словарям
+router = Router()
+dp.register_message_handler(router.dispatch_message, router.filter_message)
+dp.register_callback_query_handler(router.dispatch_callback_query, router.filter_callback_query)
+
 # ===== Throttling Middleware (ограничение на скорость для всех сообщений) =====
 class ThrottlingMiddleware(BaseMiddleware):
     def __init__(self, limit=1):
@@ -46,7 +54,6 @@ dp.storage.data = {}
 dp.middleware.setup(ThrottlingMiddleware(limit=1))
 
 # ===== Глобальные переменные =====
-user_data = {}       # Для хранения состояния конвертации
 subscribers = set()  # ID подписанных пользователей
 alerts = {}          # Будильники
 
@@ -55,14 +62,7 @@ logging.basicConfig(level=logging.INFO)
 # ===== Клавиатуры =====
 def main_keyboard():
     keyboard = ReplyKeyboardMarkup(resize_keyboard=True)
-    buttons = [
-        "USD", "EUR", "JPY", "TRY", "RUB", "AED",
-        "📊 Подписаться", "❌ Отписаться",
-        "🔔 Установить будильник", "📉 График курса",
-        "📊 Лучшие обменники в Ижевске",
-        "📋 Мои будильники"
-    ]
-    keyboard.add(*buttons)
+    keyboard.add(*MAIN_MENU_BUTTONS)
     return keyboard
 
 def cancel_inline_keyboard():
@@ -90,8 +90,24 @@ def best_rates_currency_keyboard():
     kb.add(*buttons)
     return kb
 
+def to_currency_keyboard():
+    kb = types.InlineKeyboardMarkup(row_width=3)
+    buttons = [
+        types.InlineKeyboardButton(text=cur, callback_data=f"to_currency:{cur}")
+        for cur in CURRENCIES
+    ]
+    kb.add(*buttons)
+    return kb
+
+# Клавиатуры не меняются, поэтому собираем и сериализуем их один раз при старте
+MAIN_KEYBOARD = serialize_markup(main_keyboard())
+CANCEL_INLINE_KEYBOARD = serialize_markup(cancel_inline_keyboard())
+GRAPH_CURRENCY_KEYBOARD = serialize_markup(graph_currency_keyboard())
+BEST_RATES_CURRENCY_KEYBOARD = serialize_markup(best_rates_currency_keyboard())
+TO_CURRENCY_KEYBOARD = serialize_markup(to_currency_keyboard())
+REMOVE_KEYBOARD = serialize_markup(ReplyKeyboardRemove())
+
 # ===== Приветствие (/start) =====
-@dp.message_handler(commands=["start"])
 async def start_command(message: Message):
     user_data.pop(message.from_user.id, None)
     welcome_text = (
@@ -105,10 +121,9 @@ async def start_command(message: Message):
         "github: https://github.com/criex1488/tgBotExchange-rates (all source code)\n\n"
         "Выберите нужное действие из меню ниже:"
     )
-    await message.answer(welcome_text, reply_markup=main_keyboard())
+    await message.answer(welcome_text, reply_markup=MAIN_KEYBOARD)
 
 # ===== Конвертация валют =====
-@dp.message_handler(lambda message: message.text in ["USD", "EUR", "JPY", "TRY", "RUB", "AED"])
 async def currency_selected(message: Message):
     user_id = message.from_user.id
     if user_id not in user_data:
@@ -123,9 +138,9 @@ async def currency_selected(message: Message):
     else:
         user_data[user_id]["from_currency"] = message.text
         # Сначала убираем reply‑клавиатуру
-        await message.answer(f"Вы выбрали {message.text}.", reply_markup=ReplyKeyboardRemove())
+        await message.answer(f"Вы выбрали {message.text}.", reply_markup=REMOVE_KEYBOARD)
         # Затем отправляем сообщение с инлайн‑кнопкой «Отмена»
-        await message.answer("Введите сумму для конвертации:", reply_markup=cancel_inline_keyboard())
+        await message.answer("Введите сумму для конвертации:", reply_markup=CANCEL_INLINE_KEYBOARD)
 
 def is_number(text: str) -> bool:
     try:
@@ -134,14 +149,11 @@ def is_number(text: str) -> bool:
     except ValueError:
         return False
 
-@dp.message_handler(lambda message: message.from_user.id in user_data 
-                    and "from_currency" in user_data[message.from_user.id] 
-                    and "amount" not in user_data[message.from_user.id])
 async def amount_selected(message: Message):
     # Если пользователь сам введёт "отмена" (в нижнем регистре) – сбрасываем состояние
     if message.text.lower() == "отмена":
         user_data.pop(message.from_user.id, None)
-        await message.reply("Операция отменена.", reply_markup=main_keyboard())
+        await message.reply("Операция отменена.", reply_markup=MAIN_KEYBOARD)
         return
 
     t = message.text.replace(',', '.')
@@ -149,40 +161,33 @@ async def amount_selected(message: Message):
         float(t)
     except ValueError:
         await message.reply("❌ Неверный формат суммы! Введите корректное число или нажмите 'Отмена'.",
-                            reply_markup=cancel_inline_keyboard())
+                            reply_markup=CANCEL_INLINE_KEYBOARD)
         return
 
     if '.' in t:
         _, fraction = t.split('.', 1)
         if len(fraction) > 2:
             await message.reply("❌ Слишком много цифр после десятичной точки. Максимум 2 цифры допустимо.",
-                                reply_markup=cancel_inline_keyboard())
+                                reply_markup=CANCEL_INLINE_KEYBOARD)
             return
 
     amount = float(t)
     if amount <= 0:
         user_data.pop(message.from_user.id, None)
-        await message.reply("❌ Сумма должна быть положительной!", reply_markup=main_keyboard())
+        await message.reply("❌ Сумма должна быть положительной!", reply_markup=MAIN_KEYBOARD)
         return
     if amount < 0.01:
         user_data.pop(message.from_user.id, None)
-        await message.reply("❌ Сумма должна быть не меньше 0.01!", reply_markup=main_keyboard())
+        await message.reply("❌ Сумма должна быть не меньше 0.01!", reply_markup=MAIN_KEYBOARD)
         return
     if amount > 1_000_000_000:
         user_data.pop(message.from_user.id, None)
-        await message.reply("❌ Слишком большая сумма. Введите сумму меньше 1,000,000,000.", reply_markup=main_keyboard())
+        await message.reply("❌ Слишком большая сумма. Введите сумму меньше 1,000,000,000.", reply_markup=MAIN_KEYBOARD)
         return
 
     user_data[message.from_user.id]["amount"] = amount
-    inline_kb = types.InlineKeyboardMarkup(row_width=3)
-    buttons = [
-        types.InlineKeyboardButton(text=cur, callback_data=f"to_currency:{cur}")
-        for cur in ["USD", "EUR", "JPY", "TRY", "RUB", "AED"]
-    ]
-    inline_kb.add(*buttons)
-    await message.answer("Теперь выберите валюту, в которую хотите конвертировать:", reply_markup=inline_kb)
+    await message.answer("Теперь выберите валюту, в которую хотите конвертировать:", reply_markup=TO_CURRENCY_KEYBOARD)
 
-@dp.callback_query_handler(lambda c: c.data and c.data.startswith("to_currency:"))
 async def process_currency_callback(callback_query: types.CallbackQuery):
     to_currency = callback_query.data.split(":", 1)[1]
     user_id = callback_query.from_user.id
@@ -199,17 +204,16 @@ async def process_currency_callback(callback_query: types.CallbackQuery):
     await bot.answer_callback_query(callback_query.id)
     await convert_currency(user_id, callback_query.message)
 
-@dp.callback_query_handler(lambda c: c.data == "cancel_conversion")
 async def cancel_conversion_handler(callback_query: types.CallbackQuery):
     user_id = callback_query.from_user.id
     user_data.pop(user_id, None)
     await bot.answer_callback_query(callback_query.id, text="Операция отменена.")
-    await bot.send_message(user_id, "Операция отменена.", reply_markup=main_keyboard())
+    await bot.send_message(user_id, "Операция отменена.", reply_markup=MAIN_KEYBOARD)
 
 async def convert_currency(user_id: int, message: Message):
     data = user_data.get(user_id)
     if not data:
-        await message.reply("❌ Ошибка данных пользователя.", reply_markup=main_keyboard())
+        await message.reply("❌ Ошибка данных пользователя.", reply_markup=MAIN_KEYBOARD)
         return
 
     from_currency = data["from_currency"]
@@ -218,11 +222,11 @@ async def convert_currency(user_id: int, message: Message):
 
     rates = get_exchange_rates()
     if not rates:
-        await message.reply("❌ Ошибка при получении данных.", reply_markup=main_keyboard())
+        await message.reply("❌ Ошибка при получении данных.", reply_markup=MAIN_KEYBOARD)
         return
 
     if rates.get(from_currency) is None or rates.get(to_currency) is None:
-        await message.reply("❌ Не удалось получить курс для выбранной валюты.", reply_markup=main_keyboard())
+        await message.reply("❌ Не удалось получить курс для выбранной валюты.", reply_markup=MAIN_KEYBOARD)
         user_data.pop(user_id, None)
         return
 
@@ -231,7 +235,7 @@ async def convert_currency(user_id: int, message: Message):
         result_str = f"{result:.6f}"
     else:
         result_str = f"{result:.2f}"
-    await message.reply(f"💱 {amount} {from_currency} = {result_str} {to_currency}", reply_markup=main_keyboard())
+    await message.reply(f"💱 {amount} {from_currency} = {result_str} {to_currency}", reply_markup=MAIN_KEYBOARD)
     user_data.pop(user_id, None)
 
 def get_exchange_rates():
@@ -305,12 +309,10 @@ graph_currency_last_time = {}
 GRAPH_CURRENCY_COOLDOWN = 5
 
 # Обработчик команды "📉 График курса" – отправляет клавиатуру для выбора валюты
-@dp.message_handler(lambda message: message.text == "📉 График курса")
 async def choose_graph_currency(message: Message):
-    await message.answer("Выберите валюту для графика курса:", reply_markup=graph_currency_keyboard())
+    await message.answer("Выберите валюту для графика курса:", reply_markup=GRAPH_CURRENCY_KEYBOARD)
 
 # Callback‑хендлер для выбора валюты графика
-@dp.callback_query_handler(lambda c: c.data and c.data.startswith("graph_currency:"))
 async def process_graph_currency(callback_query: types.CallbackQuery):
     currency = callback_query.data.split(":", 1)[1]
     user_id = callback_query.from_user.id
@@ -335,10 +337,10 @@ async def process_graph_currency(callback_query: types.CallbackQuery):
             hist_text, image_bytes = await loop.run_in_executor(None, lambda: generate_currency_graph(currency))
         except Exception as e:
             logging.error(f"Ошибка генерации графика для {currency}: {e}")
-            await callback_query.message.reply("❌ Не удалось получить данные для графика.", reply_markup=main_keyboard())
+            await callback_query.message.reply("❌ Не удалось получить данные для графика.", reply_markup=MAIN_KEYBOARD)
             return
         await callback_query.message.reply(hist_text)
-        await callback_query.message.reply_photo(image_bytes, reply_markup=main_keyboard())
+        await callback_query.message.reply_photo(image_bytes, reply_markup=MAIN_KEYBOARD)
         await callback_query.answer()
 
 # ===== Лучшие обменники (обновлённые с выбором валюты) =====
@@ -463,14 +465,12 @@ best_rates_last_time = {}
 BEST_RATES_COOLDOWN = 3
 
 # Обработчик команды "📊 Лучшие обменники в Ижевске" – отправляет клавиатуру для выбора валюты
-@dp.message_handler(lambda message: message.text == "📊 Лучшие обменники в Ижевске")
 async def choose_best_rates_currency(message: Message):
     await message.answer(
         "Выберите валюту для просмотра лучших обменников (доступны только USD и EUR, для других валют обмен недоступен в г.Ижевск):",
-        reply_markup=best_rates_currency_keyboard())
+        reply_markup=BEST_RATES_CURRENCY_KEYBOARD)
 
 # Callback‑хендлер для выбора валюты в разделе лучших обменников
-@dp.callback_query_handler(lambda c: c.data and c.data.startswith("best_rates_currency:"))
 async def process_best_rates_currency(callback_query: types.CallbackQuery):
     currency = callback_query.data.split(":", 1)[1]
     user_id = callback_query.from_user.id
@@ -493,43 +493,38 @@ async def process_best_rates_currency(callback_query: types.CallbackQuery):
         loop = asyncio.get_event_loop()
         banks = await loop.run_in_executor(None, lambda: get_best_exchange_rates(currency, force_update=False))
         if not banks:
-            await callback_query.message.reply("Не удалось получить данные о курсах валют.", reply_markup=main_keyboard())
+            await callback_query.message.reply("Не удалось получить данные о курсах валют.", reply_markup=MAIN_KEYBOARD)
             return
         text = generate_best_rates_text(banks, currency)
-        await callback_query.message.reply(text, parse_mode="Markdown", disable_web_page_preview=True, reply_markup=main_keyboard())
+        await callback_query.message.reply(text, parse_mode="Markdown", disable_web_page_preview=True, reply_markup=MAIN_KEYBOARD)
         await callback_query.answer()
 
 # ===== Подписка =====
-@dp.message_handler(lambda message: message.text == "📊 Подписаться")
 async def subscribe_command(message: Message):
     subscribers.add(message.from_user.id)
-    await message.reply("✅ Вы подписаны на ежедневные курсы валют!", reply_markup=main_keyboard())
+    await message.reply("✅ Вы подписаны на ежедневные курсы валют!", reply_markup=MAIN_KEYBOARD)
 
-@dp.message_handler(lambda message: message.text == "❌ Отписаться")
 async def unsubscribe_command(message: Message):
     subscribers.discard(message.from_user.id)
-    await message.reply("❌ Вы отписались от ежедневных курсов.", reply_markup=main_keyboard())
+    await message.reply("❌ Вы отписались от ежедневных курсов.", reply_markup=MAIN_KEYBOARD)
 
 # ===== Будильники =====
-@dp.message_handler(lambda message: message.text == "🔔 Установить будильник")
 async def alert_start(message: Message):
     await message.reply("Введите команду в формате:\n"
                         "`/alert USD 100.50` или `/alert USD > 100.02` или `/alert USD < 94.30`",
-                        reply_markup=main_keyboard())
+                        reply_markup=MAIN_KEYBOARD)
 
-@dp.message_handler(lambda message: message.text.lower().startswith("/alert"))
 async def set_alert(message: Message):
     parts = message.text.split()
     if len(parts) < 3:
         await message.reply("❌ Неправильный формат! Используйте:\n"
                             "`/alert USD 100.50` или `/alert USD > 100.02`",
-                            reply_markup=main_keyboard())
+                            reply_markup=MAIN_KEYBOARD)
         return
     currency = parts[1].upper()
-    allowed_currencies = ["USD", "EUR", "JPY", "TRY", "RUB", "AED"]
-    if currency not in allowed_currencies:
-        await message.reply(f"❌ Валюта {currency} не поддерживается. Доступны: {', '.join(allowed_currencies)}",
-                            reply_markup=main_keyboard())
+    if currency not in CURRENCIES:
+        await message.reply(f"❌ Валюта {currency} не поддерживается. Доступны: {', '.join(CURRENCIES)}",
+                            reply_markup=MAIN_KEYBOARD)
         return
     try:
         if parts[2] in [">", "<"] and len(parts) >= 4:
@@ -539,7 +534,7 @@ async def set_alert(message: Message):
             target_price = float(parts[2])
             rates = get_exchange_rates()
             if not rates or currency not in rates:
-                await message.reply("❌ Не удалось получить текущий курс. Попробуйте позже.", reply_markup=main_keyboard())
+                await message.reply("❌ Не удалось получить текущий курс. Попробуйте позже.", reply_markup=MAIN_KEYBOARD)
                 return
             current_rate = rates[currency]
             operator = ">" if target_price > current_rate else "<"
@@ -553,40 +548,37 @@ async def set_alert(message: Message):
             "direction": direction
         })
         await message.reply(f"🔔 Будильник установлен: {currency} {'>' if direction=='up' else '<'} {target_price}₽",
-                            reply_markup=main_keyboard())
+                            reply_markup=MAIN_KEYBOARD)
     except ValueError:
-        await message.reply("❌ Ошибка! Введите число, например: `/alert USD 100.50`", reply_markup=main_keyboard())
+        await message.reply("❌ Ошибка! Введите число, например: `/alert USD 100.50`", reply_markup=MAIN_KEYBOARD)
 
-@dp.message_handler(commands=["myalerts"])
-@dp.message_handler(lambda message: message.text == "📋 Мои будильники")
 async def view_alerts(message: Message):
     user_id = message.from_user.id
     if user_id not in alerts or not alerts[user_id]:
-        await message.reply("У вас нет установленных будильников.", reply_markup=main_keyboard())
+        await message.reply("У вас нет установленных будильников.", reply_markup=MAIN_KEYBOARD)
         return
     text_lines = ["Ваши будильники:"]
     for idx, alert in enumerate(alerts[user_id], start=1):
         text_lines.append(f"{idx}. {alert['currency']} {'>' if alert['direction']=='up' else '<'} {alert['target']}₽")
     text_lines.append("\nЧтобы удалить будильник, используйте команду:\n`/delete_alert <номер>`")
-    await message.reply("\n".join(text_lines), parse_mode="Markdown", reply_markup=main_keyboard())
+    await message.reply("\n".join(text_lines), parse_mode="Markdown", reply_markup=MAIN_KEYBOARD)
 
-@dp.message_handler(commands=["delete_alert"])
 async def delete_alert(message: Message):
     parts = message.text.split()
     if len(parts) < 2:
-        await message.reply("❌ Укажите номер будильника для удаления, например: `/delete_alert 1`", reply_markup=main_keyboard())
+        await message.reply("❌ Укажите номер будильника для удаления, например: `/delete_alert 1`", reply_markup=MAIN_KEYBOARD)
         return
     try:
         index = int(parts[1]) - 1
         user_id = message.from_user.id
         if user_id not in alerts or index < 0 or index >= len(alerts[user_id]):
-            await message.reply("❌ Будильник с таким номером не найден.", reply_markup=main_keyboard())
+            await message.reply("❌ Будильник с таким номером не найден.", reply_markup=MAIN_KEYBOARD)
             return
         removed = alerts[user_id].pop(index)
         await message.reply(f"✅ Будильник {removed['currency']} {'>' if removed['direction']=='up' else '<'} {removed['target']}₽ удалён.",
-                            reply_markup=main_keyboard())
+                            reply_markup=MAIN_KEYBOARD)
     except ValueError:
-        await message.reply("❌ Неверный формат номера. Используйте: `/delete_alert 1`", reply_markup=main_keyboard())
+        await message.reply("❌ Неверный формат номера. Используйте: `/delete_alert 1`", reply_markup=MAIN_KEYBOARD)
 
 # ===== Фоновые задачи =====
 async def daily_exchange_rates():
@@ -599,7 +591,7 @@ async def daily_exchange_rates():
             )
             for user_id in subscribers:
                 try:
-                    await bot.send_message(user_id, text, parse_mode="Markdown", reply_markup=main_keyboard())
+                    await bot.send_message(user_id, text, parse_mode="Markdown", reply_markup=MAIN_KEYBOARD)
                 except Exception as e:
                     logging.error(f"Ошибка при отправке подписчику {user_id}: {e}")
 
@@ -621,7 +613,7 @@ async def check_alerts():
                         await bot.send_message(
                             user_id,
                             f"🚀 {alert['currency']} достиг значения больше {alert['target']}₽ (текущий: {curr_rate}₽)!",
-                            reply_markup=main_keyboard()
+                            reply_markup=MAIN_KEYBOARD
                         )
                     except Exception as e:
                         logging.error(f"Ошибка отправки alert для {user_id}: {e}")
@@ -631,7 +623,7 @@ async def check_alerts():
                         await bot.send_message(
                             user_id,
                             f"🚀 {alert['currency']} достиг значения меньше {alert['target']}₽ (текущий: {curr_rate}₽)!",
-                            reply_markup=main_keyboard()
+                            reply_markup=MAIN_KEYBOARD
                         )
                     except Exception as e:
                         logging.error(f"Ошибка отправки alert для {user_id}: {e}")
@@ -641,9 +633,15 @@ async def check_alerts():
                 alerts[user_id] = new_alerts
             else:
                 alerts.pop(user_id)
-                
+
+# ===== Маршруты =====
+# Таблица общая с bench_router.py, хендлеры берутся из этого модуля по имени
+router.register(ROUTES, globals())
+
 async def on_startup(_):
     loop = asyncio.get_event_loop()
+    # Username нужен роутеру, чтобы отличать "/start@наш_бот" от команд другим ботам
+    router.username = (await bot.me).username
     # Предварительное обновление кэша для валюты USD (можно добавить и для других валют)
     await loop.run_in_executor(None, lambda: get_best_exchange_rates("USD", force_update=True))
     asyncio.create_task(best_rates_cache_refresher())
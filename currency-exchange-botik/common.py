@@ -0,0 +1,61 @@
+"""
+Общие тексты кнопок и состояние конвертации.
+
+Вынесены из bot.py, чтобы bench_router.py маршрутизировал ровно те же апдейты, что и бот.
+"""
+
+CURRENCIES = ["USD", "EUR", "JPY", "TRY", "RUB", "AED"]
+
+BTN_SUBSCRIBE = "📊 Подписаться"
+BTN_UNSUBSCRIBE = "❌ Отписаться"
+BTN_ALERT = "🔔 Установить будильник"
+BTN_GRAPH = "📉 График курса"
+BTN_BEST_RATES = "📊 Лучшие обменники в Ижевске"
+BTN_MY_ALERTS = "📋 Мои будильники"
+
+MAIN_MENU_BUTTONS = [
+    *CURRENCIES,
+    BTN_SUBSCRIBE, BTN_UNSUBSCRIBE,
+    BTN_ALERT, BTN_GRAPH,
+    BTN_BEST_RATES,
+    BTN_MY_ALERTS
+]
+
+user_data = {}  # Для хранения состояния конвертации
+
+
+def is_entering_amount(message) -> bool:
+    """Пользователь выбрал исходную валюту и должен ввести сумму."""
+    return (message.from_user.id in user_data
+            and "from_currency" in user_data[message.from_user.id]
+            and "amount" not in user_data[message.from_user.id])
+
+
+def is_alert_command(message) -> bool:
+    """Как и раньше, /alert ловится по префиксу: "/alertUSD", "/alert@другой_бот USD 1"."""
+    return message.text.lower().startswith("/alert")
+
+
+# ===== Таблица маршрутов =====
+# (вид, ключ, имя хендлера в bot.py) в порядке прежней регистрации хендлеров.
+# По ней собирается Router в bot.py и оба Dispatcher'а в bench_router.py.
+# Для "text" ключ - кортеж текстов, для "fallback" - предикат.
+ROUTES = [
+    ("command", "start", "start_command"),
+    ("text", tuple(CURRENCIES), "currency_selected"),
+    ("fallback", is_entering_amount, "amount_selected"),
+    ("callback_prefix", "to_currency", "process_currency_callback"),
+    ("callback", "cancel_conversion", "cancel_conversion_handler"),
+    ("text", (BTN_GRAPH,), "choose_graph_currency"),
+    ("callback_prefix", "graph_currency", "process_graph_currency"),
+    ("text", (BTN_BEST_RATES,), "choose_best_rates_currency"),
+    ("callback_prefix", "best_rates_currency", "process_best_rates_currency"),
+    ("text", (BTN_SUBSCRIBE,), "subscribe_command"),
+    ("text", (BTN_UNSUBSCRIBE,), "unsubscribe_command"),
+    ("text", (BTN_ALERT,), "alert_start"),
+    ("command", "alert", "set_alert"),
+    ("fallback", is_alert_command, "set_alert"),
+    ("command", "myalerts", "view_alerts"),
+    ("text", (BTN_MY_ALERTS,), "view_alerts"),
+    ("command", "delete_alert", "delete_alert"),
+]
@@ -0,0 +1,111 @@
+"""
+Маршрутизация апдейтов по хэш-таблицам.
+
+Вместо цепочки lambda-фильтров, которые aiogram проверяет по очереди для каждого
+сообщения, точные тексты кнопок, команды и callback_data ищутся в словарях за O(1).
+Предикаты проверяются только для свободного ввода, когда точного совпадения нет.
+"""
+import json
+
+
+def serialize_markup(markup):
+    """Сериализует клавиатуру в JSON один раз, чтобы не делать это при каждой отправке."""
+    return json.dumps(markup.to_python(), ensure_ascii=False)
+
+
+class Router:
+    def __init__(self):
+        self.texts = {}             # точный текст кнопки -> хендлер
+        self.commands = {}          # "/команда" -> хендлер
+        self.callbacks = {}         # точная callback_data -> хендлер
+        self.callback_prefixes = {} # префикс callback_data до ":" -> хендлер
+        self.fallbacks = []         # (предикат, хендлер) для свободного ввода
+        self.username = None        # username бота, заполняется при старте через bot.get_me()
+
+    # ===== Регистрация =====
+    def text(self, *texts):
+        def decorator(handler):
+            for text in texts:
+                self.texts[text] = handler
+            return handler
+        return decorator
+
+    def command(self, *commands):
+        def decorator(handler):
+            for command in commands:
+                self.commands["/" + command.lower()] = handler
+            return handler
+        return decorator
+
+    def callback(self, data):
+        def decorator(handler):
+            self.callbacks[data] = handler
+            return handler
+        return decorator
+
+    def callback_prefix(self, prefix):
+        def decorator(handler):
+            self.callback_prefixes[prefix] = handler
+            return handler
+        return decorator
+
+    def fallback(self, predicate):
+        def decorator(handler):
+            self.fallbacks.append((predicate, handler))
+            return handler
+        return decorator
+
+    def register(self, routes, handlers):
+        """Регистрирует таблицу маршрутов вида (вид, ключ, имя хендлера), см. common.ROUTES."""
+        for kind, key, name in routes:
+            add = getattr(self, kind)
+            decorator = add(*key) if kind == "text" else add(key)
+            decorator(handlers[name])
+
+    # ===== Поиск хендлера =====
+    def resolve_message(self, message):
+        text = message.text
+        handler = self.texts.get(text)
+        if handler is not None:
+            return handler
+        if text.startswith("/"):
+            # "/alert USD 100" -> "/alert", "/start@bot" -> "/start"
+            command, _, mention = text.split(maxsplit=1)[0].partition("@")
+            # Команды, адресованные другому боту в группе, не наши
+            if not mention or (self.username and mention.lower() == self.username.lower()):
+                handler = self.commands.get(command.lower())
+                if handler is not None:
+                    return handler
+        for predicate, handler in self.fallbacks:
+            if predicate(message):
+                return handler
+        return None
+
+    def resolve_callback(self, callback_query):
+        data = callback_query.data
+        if not data:
+            return None
+        handler = self.callbacks.get(data)
+        if handler is not None:
+            return handler
+        prefix, sep, _ = data.partition(":")
+        if sep:
+            return self.callback_prefixes.get(prefix)
+        return None
+
+    # ===== Точки входа для Dispatcher =====
+    # Фильтры возвращают найденный хендлер как данные для aiogram: апдейты без маршрута
+    # не проходят фильтр и, как и раньше, не доходят до middleware (например, троттлинга).
+    def filter_message(self, message):
+        handler = self.resolve_message(message)
+        return handler is not None and {"route": handler}
+
+    def filter_callback_query(self, callback_query):
+        handler = self.resolve_callback(callback_query)
+        return handler is not None and {"route": handler}
+
+    async def dispatch_message(self, message, route):
+        return await route(message)
+
+    async def dispatch_callback_query(self, callback_query, route):
+        return await route(callback_query)